@@ -0,0 +1,44 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Optional compiled haversine kernels for find_pantry.py.
+
+Build in place (needs Cython and a C compiler):
+  cythonize -i scripts/_haversine.pyx
+
+find_pantry.py picks the extension up automatically when it sits next to the script
+and falls back to its pure-Python/NumPy code otherwise.
+"""
+from cython cimport floating
+from libc.math cimport asin, cos, sin, sqrt, M_PI
+
+cdef double EARTH_RADIUS_KM = 6371.0
+cdef double DEG2RAD = M_PI / 180.0
+
+
+cdef inline double haversine_c(double lat1, double lon1, double lat2, double lon2) noexcept nogil:
+    cdef double phi1 = lat1 * DEG2RAD
+    cdef double phi2 = lat2 * DEG2RAD
+    cdef double s_dphi = sin((lat2 - lat1) * DEG2RAD * 0.5)
+    cdef double s_dlambda = sin((lon2 - lon1) * DEG2RAD * 0.5)
+    cdef double a = s_dphi * s_dphi + cos(phi1) * cos(phi2) * s_dlambda * s_dlambda
+    return 2.0 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+def haversine(double lat1, double lon1, double lat2, double lon2):
+    """Return distance in kilometers between two points."""
+    return haversine_c(lat1, lon1, lat2, lon2)
+
+
+def haversine_a_array(double q_lat_rad, double q_lon_rad, double q_cos,
+                      floating[::1] lat_rad, floating[::1] lon_rad, floating[::1] cos_lat, double[::1] out):
+    """Haversine term `a` from one query point to points given in radians (with cos of latitude), into `out`.
+
+    Distance in km is 2 * R * asin(sqrt(a)).
+    """
+    cdef Py_ssize_t i, n = lat_rad.shape[0]
+    cdef double s_dphi, s_dlambda
+    with nogil:
+        for i in range(n):
+            s_dphi = sin((lat_rad[i] - q_lat_rad) * 0.5)
+            s_dlambda = sin((lon_rad[i] - q_lon_rad) * 0.5)
+            out[i] = s_dphi * s_dphi + q_cos * cos_lat[i] * s_dlambda * s_dlambda
@@ -16,24 +16,144 @@ Notes:
 from __future__ import annotations
 
 import argparse
+import asyncio
 import csv
+import functools
 import math
+import os
+import pickle
+import re
+import sqlite3
 import sys
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
+
+import numpy as np
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     requests = None  # we'll fail with a helpful message
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # stdlib json via resp.json()
+
+try:
+    # optional compiled kernels, built with: cythonize -i scripts/_haversine.pyx
+    from . import _haversine
+except ImportError:
+    try:
+        import _haversine  # run as a script, so scripts/ is on sys.path
+    except ImportError:
+        _haversine = None
+
+if TYPE_CHECKING:
+    from sklearn.neighbors import BallTree
+
 
 DATA_FILE = Path(__file__).resolve().parents[1] / "data" / "pantries.csv"
+ZIP_FILE = DATA_FILE.parent / "zip_centroids.csv"
+PANTRY_CACHE_VERSION = 4
+# numba, scikit-learn and aiohttp are imported lazily: each costs 0.1-1 s at import time,
+# which only pays off on large datasets or batches, so a one-shot lookup never loads them
+# build a BallTree for a find_nearest_many batch once queries x pantries reaches this; measured
+# break-even (scikit-learn import + build vs. brute-force scans) is 1.5e8-4e8 for 10k-1M pantries
+TREE_MIN_WORK = 200_000_000
+# use the parallel Numba kernel for a brute-force batch of this many queries x pantries on
+# NUMBA_MIN_THREADS+ cores: single-threaded it is slower than NumPy (17 vs 8 ns/row), and the
+# import + compile (0.55-0.85 s) is paid back at 4 threads after about 1.5e8-2.4e8 rows scanned
+NUMBA_MIN_WORK = 200_000_000
+NUMBA_MIN_THREADS = 4
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+GEOCODE_CACHE_FILE = DATA_FILE.parent / "geocode_cache.sqlite"
+GEOCODE_CACHE_TTL = 30 * 24 * 3600  # seconds
+NOMINATIM_MIN_INTERVAL = 1.0  # seconds between blocking requests (public usage policy)
+EARTH_RADIUS_KM = 6371.0
+_A_SLACK = 1e-6  # upper bound on the float32 rounding error of the haversine term `a`
+# short alphanumeric token (letters, digits, spaces, hyphens) with at least one digit
+_POSTAL_RE = re.compile(r"^(?=.{1,10}$)(?=.*\d)[A-Za-z0-9 \-]+$")
+USER_AGENT = "FoodPantryProject/1.0 (contact: example@example.com)"
+
+
+def _make_session() -> Optional["requests.Session"]:
+    """Shared HTTP session so repeated calls reuse pooled keep-alive connections."""
+    if requests is None:
+        return None
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_SESSION = _make_session()
+
+
+@dataclass(eq=False)
+class Pantries:
+    """Pantry data stored column-wise: parallel name/address lists plus float64 coordinate arrays.
+
+    Rows are kept sorted by latitude so radius queries can binary-search a latitude band;
+    unsorted input is reordered unless a prebuilt `tree` is passed, in which case it must already be sorted.
+    """
+
+    names: List[str]
+    addrs: List[str]
+    lats: np.ndarray
+    lons: np.ndarray
+    # haversine BallTree over (lat, lon) in radians, built by find_nearest_many for batches big
+    # enough to pay for it and reused by later queries; None until then or without scikit-learn
+    tree: Optional["BallTree"] = field(default=None, repr=False)
+    # derived once from lats/lons since pantry coordinates never change between queries:
+    # float32 radians/cos for ranking in the distance kernel (half the memory traffic; reported
+    # distances are recomputed in float64 from lats/lons for the selected rows)
+    # and int32 fixed-point degrees (1e-7 deg units) for the integer bounding-box reject
+    lat_rad: np.ndarray = field(init=False, repr=False)
+    lon_rad: np.ndarray = field(init=False, repr=False)
+    cos_lat: np.ndarray = field(init=False, repr=False)
+    lat_e7: np.ndarray = field(init=False, repr=False)
+    lon_e7: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.lats = np.asarray(self.lats, dtype=np.float64)
+        self.lons = np.asarray(self.lons, dtype=np.float64)
+        if np.any(self.lats[1:] < self.lats[:-1]):
+            if self.tree is not None:
+                # reordering would leave the tree's indices pointing at the wrong rows
+                raise ValueError("Pantries rows must be sorted by latitude when a tree is given")
+            order = np.argsort(self.lats, kind="stable")
+            self.names = [self.names[i] for i in order]
+            self.addrs = [self.addrs[i] for i in order]
+            self.lats = self.lats[order]
+            self.lons = self.lons[order]
+        lat_rad = np.radians(self.lats)
+        self.lat_rad = lat_rad.astype(np.float32)
+        self.lon_rad = np.radians(self.lons).astype(np.float32)
+        self.cos_lat = np.cos(lat_rad).astype(np.float32)
+        self.lat_e7 = np.rint(self.lats * 1e7).astype(np.int32)
+        self.lon_e7 = np.rint(self.lons * 1e7).astype(np.int32)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, i: int) -> Tuple[str, str, float, float]:
+        """Row view (name, address, lat, lon); bulk work should use the columns directly."""
+        return self.names[i], self.addrs[i], float(self.lats[i]), float(self.lons[i])
 
 
 def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Return distance in kilometers between two points."""
-    R = 6371.0
+    R = EARTH_RADIUS_KM
     phi1 = math.radians(lat1)
     phi2 = math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
@@ -42,54 +162,287 @@ def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return 2 * R * math.asin(math.sqrt(a))
 
 
-def load_pantries(csv_path: Path) -> List[Tuple[str, str, float, float]]:
-    pantries: List[Tuple[str, str, float, float]] = []
+if _haversine is not None:
+    haversine = _haversine.haversine  # noqa: F811 - compiled drop-in with the same signature
+
+
+def load_pantries(csv_path: Path) -> Pantries:
+    """Load pantries from CSV, reusing the parsed copy cached beside it while the CSV is unchanged."""
     if not csv_path.exists():
         raise FileNotFoundError(f"Pantry data file not found: {csv_path}")
-    with csv_path.open("r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                name = row.get("name") or "Unnamed"
-                addr = row.get("address") or ""
-                lat = float(row["lat"])
-                lon = float(row["lon"])
-                pantries.append((name, addr, lat, lon))
-            except Exception as e:
-                print(f"Skipping invalid row: {row} -> {e}")
+    stamp = _file_stamp(csv_path)
+    cache_path = csv_path.with_suffix(".pkl")
+    pantries = _read_pantry_cache(cache_path, stamp)
+    if pantries is None:
+        pantries = _parse_pantries_csv(csv_path)
+        _write_pantry_cache(cache_path, stamp, pantries)
     return pantries
 
 
-def geocode_address(address: str) -> Optional[Tuple[float, float]]:
-    """Use Nominatim to geocode address. Returns (lat, lon) or None on failure."""
-    if requests is None:
-        print("The 'requests' package is required for geocoding. Install with: pip install requests")
-        return None
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"q": address, "format": "json", "limit": 5}
-    headers = {"User-Agent": "FoodPantryProject/1.0 (contact: example@example.com)"}
+def _build_tree(pantries: Pantries) -> Optional["BallTree"]:
     try:
-        resp = requests.get(url, params=params, headers=headers, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        if not data:
-            print("Address not found by geocoder.")
+        from sklearn.neighbors import BallTree
+    except ImportError:
+        return None  # fall back to a brute-force scan
+    coords_rad = np.radians(np.column_stack([pantries.lats, pantries.lons]))
+    return BallTree(coords_rad, metric="haversine", leaf_size=40)
+
+
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def _read_pantry_cache(cache_path: Path, stamp: Tuple[int, int]) -> Optional[Pantries]:
+    try:
+        with cache_path.open("rb") as f:
+            cached = pickle.load(f)
+        if cached["version"] != PANTRY_CACHE_VERSION or cached["stamp"] != stamp:
             return None
-        # return the top result (latitude, longitude)
-        lat = float(data[0]["lat"])
-        lon = float(data[0]["lon"])
-        return lat, lon
+        return Pantries(cached["names"], cached["addrs"], cached["lats"], cached["lons"])
+    except Exception:
+        return None  # missing, stale or unreadable cache: reparse the CSV
+
+
+def _write_pantry_cache(cache_path: Path, stamp: Tuple[int, int], pantries: Pantries) -> None:
+    # no tree: unpickling one imports scikit-learn, which a single lookup never needs
+    cached = {
+        "version": PANTRY_CACHE_VERSION,
+        "stamp": stamp,
+        "names": pantries.names,
+        "addrs": pantries.addrs,
+        "lats": pantries.lats,
+        "lons": pantries.lons,
+    }
+    try:
+        with cache_path.open("wb") as f:
+            pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # e.g. read-only data directory; we'll just parse again next time
+
+
+def _parse_pantries_csv(csv_path: Path) -> Pantries:
+    with csv_path.open("r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        rows = [row for row in reader if row]  # DictReader also skipped blank lines
+    cols = {h: i for i, h in enumerate(header)}
+    for required in ("lat", "lon"):
+        if required not in cols:
+            raise ValueError(f"Pantry data file {csv_path} has no '{required}' column")
+
+    def column(key: str) -> List[str]:
+        i = cols.get(key)
+        return [row[i] if i is not None and i < len(row) else "" for row in rows]
+
+    names = [n or "Unnamed" for n in column("name")]
+    addrs = column("address")
+    lat_strs, lon_strs = column("lat"), column("lon")
+    try:
+        # parse each coordinate column in one C-level pass
+        lat_arr = np.array(lat_strs, dtype=np.float64)
+        lon_arr = np.array(lon_strs, dtype=np.float64)
+    except ValueError:
+        lat_arr, lon_arr, keep = _parse_coords_rowwise(rows, lat_strs, lon_strs)
+        rows = [rows[i] for i in keep]
+        names = [names[i] for i in keep]
+        addrs = [addrs[i] for i in keep]
+
+    # 'nan', 'inf' and out-of-range values parse fine but would poison the distance math
+    valid = np.isfinite(lat_arr) & np.isfinite(lon_arr) & (np.abs(lat_arr) <= 90) & (np.abs(lon_arr) <= 180)
+    if not valid.all():
+        for i in np.flatnonzero(~valid):
+            print(f"Skipping invalid row: {rows[i]} -> lat/lon not finite or out of range")
+        keep = np.flatnonzero(valid)
+        names = [names[i] for i in keep]
+        addrs = [addrs[i] for i in keep]
+        lat_arr, lon_arr = lat_arr[keep], lon_arr[keep]
+
+    return Pantries(names, addrs, lat_arr, lon_arr)
+
+
+def _parse_coords_rowwise(rows, lat_strs, lon_strs):
+    """Slow path for files with bad coordinates: skip (and report) each unparseable row."""
+    lats: List[float] = []
+    lons: List[float] = []
+    keep: List[int] = []
+    for i, (row, lat_str, lon_str) in enumerate(zip(rows, lat_strs, lon_strs)):
+        try:
+            lat, lon = float(lat_str), float(lon_str)
+        except ValueError as e:
+            print(f"Skipping invalid row: {row} -> {e}")
+            continue
+        lats.append(lat)
+        lons.append(lon)
+        keep.append(i)
+    return np.array(lats, dtype=np.float64), np.array(lons, dtype=np.float64), keep
+
+
+def geocode_address(address: str) -> Optional[Tuple[float, float]]:
+    """Use Nominatim to geocode address. Returns (lat, lon) or None on failure.
+
+    Results are memoized in-process and persisted to GEOCODE_CACHE_FILE, keyed by the
+    normalized address, so repeated lookups skip the network round trip.
+    """
+    try:
+        return _geocode_cached(_normalize_address(address))
+    except LookupError as e:
+        print(e)
+        return None
     except Exception as e:
         print(f"Geocoding failed: {e}")
         return None
 
 
+def _normalize_address(address: str) -> str:
+    return " ".join(address.split()).lower()
+
+
+@functools.lru_cache(maxsize=4096)
+def _geocode_cached(key: str) -> Tuple[float, float]:
+    # failures raise instead of returning None so they are never memoized
+    latlon = _geocode_cache_get(key)
+    if latlon is None:
+        latlon = _nominatim_search(key)
+        _geocode_cache_put(key, latlon)
+    return latlon
+
+
+def _nominatim_search(address: str) -> Tuple[float, float]:
+    if requests is None:
+        raise LookupError("The 'requests' package is required for geocoding. Install with: pip install requests")
+    _nominatim_throttle()
+    resp = _SESSION.get(NOMINATIM_URL, params=_nominatim_params(address), timeout=10)
+    resp.raise_for_status()
+    return _parse_nominatim(orjson.loads(resp.content) if orjson is not None else resp.json())
+
+
+_throttle_lock = threading.Lock()
+_last_request = 0.0
+
+
+def _nominatim_throttle() -> None:
+    """Space blocking Nominatim requests at least NOMINATIM_MIN_INTERVAL apart, across threads."""
+    global _last_request
+    with _throttle_lock:
+        wait = _last_request + NOMINATIM_MIN_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_request = time.monotonic()
+
+
+def _nominatim_params(address: str) -> dict:
+    # only the top hit's lat/lon is used, so ask for the smallest payload
+    return {"q": address, "format": "jsonv2", "limit": 1, "addressdetails": 0, "extratags": 0, "namedetails": 0}
+
+
+def _parse_nominatim(data) -> Tuple[float, float]:
+    if not data:
+        raise LookupError("Address not found by geocoder.")
+    # return the top result (latitude, longitude)
+    return float(data[0]["lat"]), float(data[0]["lon"])
+
+
+def _geocode_cache_connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(GEOCODE_CACHE_FILE)
+    conn.execute("CREATE TABLE IF NOT EXISTS geocode (key TEXT PRIMARY KEY, lat REAL, lon REAL, ts REAL)")
+    return conn
+
+
+def _geocode_cache_get(key: str) -> Optional[Tuple[float, float]]:
+    try:
+        with closing(_geocode_cache_connect()) as conn:
+            row = conn.execute(
+                "SELECT lat, lon FROM geocode WHERE key = ? AND ts >= ?", (key, time.time() - GEOCODE_CACHE_TTL)
+            ).fetchone()
+    except sqlite3.Error:
+        return None  # the cache is best-effort; fall through to the network
+    return (row[0], row[1]) if row else None
+
+
+def _geocode_cache_put(key: str, latlon: Tuple[float, float]) -> None:
+    try:
+        with closing(_geocode_cache_connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)", (key, latlon[0], latlon[1], time.time()))
+    except sqlite3.Error:
+        pass
+
+
+def geocode_many(
+    addresses: List[str], concurrency: int = 1, delay: float = 1.0
+) -> List[Optional[Tuple[float, float]]]:
+    """Geocode several addresses, returning (lat, lon) or None for each, in input order.
+
+    Cache misses are fetched concurrently with aiohttp. The defaults keep to Nominatim's
+    public usage policy (one request per second); raise `concurrency` and lower `delay`
+    only against a self-hosted instance. Without aiohttp this is a serial geocode_address loop,
+    spaced NOMINATIM_MIN_INTERVAL apart.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        return [geocode_address(a) for a in addresses]
+    return asyncio.run(geocode_many_async(addresses, concurrency, delay))
+
+
+async def geocode_many_async(
+    addresses: List[str], concurrency: int = 1, delay: float = 1.0
+) -> List[Optional[Tuple[float, float]]]:
+    import aiohttp
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")  # a zero-slot semaphore would never be acquired
+    keys = [_normalize_address(a) for a in addresses]
+    found = {}
+    for key in set(keys):
+        latlon = _geocode_cache_get(key)
+        if latlon is not None:
+            found[key] = latlon
+    misses = [k for k in dict.fromkeys(keys) if k not in found]
+    if misses:
+        sem = asyncio.Semaphore(concurrency)
+        started = 0
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(headers={"User-Agent": USER_AGENT}, timeout=timeout) as session:
+
+            async def fetch(key):
+                nonlocal started
+                async with sem:
+                    started += 1
+                    try:
+                        latlon = await _nominatim_search_async(session, key)
+                    except LookupError as e:
+                        print(f"{key}: {e}")
+                        return
+                    except Exception as e:
+                        print(f"Geocoding failed for {key!r}: {e}")
+                        return
+                    finally:
+                        if started < len(misses):
+                            await asyncio.sleep(delay)  # hold the slot only while requests are still queued
+                found[key] = latlon
+                _geocode_cache_put(key, latlon)
+
+            await asyncio.gather(*(fetch(k) for k in misses))
+    return [found.get(k) for k in keys]
+
+
+async def _nominatim_search_async(session, address: str) -> Tuple[float, float]:
+    async with session.get(NOMINATIM_URL, params=_nominatim_params(address)) as resp:
+        resp.raise_for_status()
+        if orjson is not None:
+            return _parse_nominatim(orjson.loads(await resp.read()))
+        return _parse_nominatim(await resp.json())
+
+
 def ip_autolocate() -> Optional[Tuple[float, float]]:
     """Best-effort IP geolocation using a free service. Returns (lat, lon) or None."""
     if requests is None:
         return None
     try:
-        resp = requests.get("https://ipinfo.io/json", timeout=5)
+        resp = _SESSION.get("https://ipinfo.io/json", timeout=5)
         resp.raise_for_status()
         data = resp.json()
         loc = data.get("loc")
@@ -101,15 +454,175 @@ def ip_autolocate() -> Optional[Tuple[float, float]]:
         return None
 
 
-def find_nearest(pantries, lat, lon, top=1, radius_km: Optional[float] = None):
-    results = []
-    for name, addr, plat, plon in pantries:
-        d = haversine(lat, lon, plat, plon)
-        if radius_km is not None and d > radius_km:
-            continue
-        results.append((d, name, addr, plat, plon))
-    results.sort(key=lambda x: x[0])
-    return results[:top]
+def find_nearest(pantries: Pantries, lat, lon, top=1, radius_km: Optional[float] = None):
+    """Return up to `top` (distance_km, name, address, lat, lon) tuples, nearest first."""
+    if top < 1 or len(pantries) == 0:
+        return []
+    if pantries.tree is not None:
+        idx, d = _nearest_tree(pantries, [(lat, lon)], top, radius_km)[0]
+    else:
+        idx, d = _nearest_brute(pantries, lat, lon, top, radius_km)
+    return _result_rows(pantries, idx, d)
+
+
+def find_nearest_many(pantries: Pantries, points, top=1, radius_km: Optional[float] = None):
+    """find_nearest for a sequence of (lat, lon) points; with a BallTree all points go in one query.
+
+    The tree is built (once, and kept on `pantries`) when the batch is large enough to pay for it.
+    """
+    if top < 1 or len(pantries) == 0 or len(points) == 0:
+        return [[] for _ in points]
+    if pantries.tree is None and len(points) * len(pantries) >= TREE_MIN_WORK:
+        pantries.tree = _build_tree(pantries)
+    if pantries.tree is None:
+        jit = len(points) * len(pantries) >= NUMBA_MIN_WORK and (os.cpu_count() or 1) >= NUMBA_MIN_THREADS
+        return [
+            _result_rows(pantries, *_nearest_brute(pantries, lat, lon, top, radius_km, jit)) for lat, lon in points
+        ]
+    return [_result_rows(pantries, idx, d) for idx, d in _nearest_tree(pantries, points, top, radius_km)]
+
+
+def _result_rows(pantries: Pantries, idx, d):
+    names = [pantries.names[i] for i in idx]
+    addrs = [pantries.addrs[i] for i in idx]
+    return list(zip(d.tolist(), names, addrs, pantries.lats[idx].tolist(), pantries.lons[idx].tolist()))
+
+
+def _nearest_tree(pantries: Pantries, points, top, radius_km):
+    """BallTree lookup for each (lat, lon) point; returns a list of (indices, distances_km), nearest first."""
+    q_rad = np.radians(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+    if radius_km is not None:
+        ind, dist = pantries.tree.query_radius(
+            q_rad, r=radius_km / EARTH_RADIUS_KM, return_distance=True, sort_results=True
+        )
+        ind = [i[:top] for i in ind]
+        dist = [dd[:top] for dd in dist]
+    else:
+        dist, ind = pantries.tree.query(q_rad, k=min(top, len(pantries)))
+    return [(i, dd * EARTH_RADIUS_KM) for i, dd in zip(ind, dist)]
+
+
+def _nearest_brute(pantries: Pantries, lat, lon, top, radius_km, jit=False):
+    """Vectorized haversine over every pantry; returns (indices, distances_km) sorted nearest first.
+
+    `jit` selects the Numba kernel, for batches big enough to pay for compiling it.
+    """
+    q_lat_rad = math.radians(lat)
+    q_lon_rad = math.radians(lon)
+    q_cos = math.cos(q_lat_rad)
+
+    if radius_km is not None and radius_km >= math.pi * EARTH_RADIUS_KM:
+        radius_km = None  # covers the whole sphere (including inf)
+
+    # rank on the float32 haversine term `a`, which is monotone in distance; only the
+    # selected rows get their distance computed exactly (float64) and converted to km
+    if radius_km is None:
+        # scan the columns in place rather than gathering copies through an index
+        idx = None
+        a = _haversine_a(q_lat_rad, q_lon_rad, q_cos, pantries.lat_rad, pantries.lon_rad, pantries.cos_lat, jit)
+    else:
+        # the box contains the whole query circle; the check on `a` does the rest, with
+        # slack for float32 rounding so rows right at the radius reach the exact check below
+        idx = _bbox_candidates(pantries, lat, lon, radius_km)
+        a = _haversine_a(
+            q_lat_rad, q_lon_rad, q_cos, pantries.lat_rad[idx], pantries.lon_rad[idx], pantries.cos_lat[idx], jit
+        )
+        keep = np.flatnonzero(a <= math.sin(radius_km / (2 * EARTH_RADIUS_KM)) ** 2 + _A_SLACK)
+        idx, a = idx[keep], a[keep]
+
+    # positions into `a` of the `top` smallest values
+    if top == 1 and len(a) > 1:
+        sel = np.array([np.argmin(a)])
+    elif len(a) > top:
+        sel = np.argpartition(a, top)[:top]
+    else:
+        sel = np.arange(len(a))
+    idx = sel if idx is None else idx[sel]
+
+    d = _haversine_km(lat, lon, pantries.lats[idx], pantries.lons[idx])
+    if radius_km is not None:
+        inside = d <= radius_km
+        idx, d = idx[inside], d[inside]
+    order = np.argsort(d, kind="stable")
+    return idx[order], d[order]
+
+
+def _haversine_km(lat, lon, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Float64 haversine from one point to arrays of points, all in degrees; same math as haversine()."""
+    phi1 = math.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = np.radians(lats - lat)
+    dlambda = np.radians(lons - lon)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _bbox_candidates(pantries: Pantries, lat, lon, radius_km) -> np.ndarray:
+    """Indices of pantries inside the lat/lon box around the query circle, using integer deltas only."""
+    if math.isnan(radius_km):
+        return np.arange(0)
+    dlat_deg = min(math.degrees(radius_km * 1.01 / EARTH_RADIUS_KM), 180.0)
+    dlat_e7 = int(dlat_deg * 1e7)
+    q_lat_e7 = int(round(lat * 1e7))
+    # rows are sorted by latitude, so the latitude band is one contiguous slice
+    lo, hi = np.searchsorted(pantries.lat_e7, [q_lat_e7 - dlat_e7, q_lat_e7 + dlat_e7 + 1])
+    idx = np.arange(lo, hi)
+    max_lat = abs(lat) + dlat_deg
+    if max_lat < 89.0:
+        dlon_deg = dlat_deg / math.cos(math.radians(max_lat))
+        if dlon_deg < 180.0:
+            # longitude deltas can reach 3.6e9, so wrap them in int64
+            dlon = pantries.lon_e7[lo:hi].astype(np.int64) - int(round(lon * 1e7))
+            dlon = (dlon + 1_800_000_000) % 3_600_000_000 - 1_800_000_000
+            idx = idx[np.abs(dlon) <= int(dlon_deg * 1e7)]
+    return idx
+
+
+def _haversine_a(q_lat_rad, q_lon_rad, q_cos, lat_rad, lon_rad, cos_lat, jit=False) -> np.ndarray:
+    """Haversine term `a` from one query point to points given in radians (with cos of latitude).
+
+    Distance in km is 2 * R * asin(sqrt(a)); `a` alone is enough for ranking and radius checks.
+    With `jit`, the Numba kernel is used when numba is installed.
+    """
+    kernel = _numba_kernel() if jit else None
+    if kernel is not None:
+        # keep the arithmetic in the columns' precision (float32), like the NumPy expression
+        dtype = lat_rad.dtype.type
+        out = np.empty(lat_rad.shape[0], dtype=lat_rad.dtype)
+        kernel(dtype(q_lat_rad), dtype(q_lon_rad), dtype(q_cos), lat_rad, lon_rad, cos_lat, out)
+        return out
+    if _haversine is not None and lat_rad.dtype == lon_rad.dtype == cos_lat.dtype:
+        out = np.empty(lat_rad.shape[0], dtype=np.float64)
+        _haversine.haversine_a_array(
+            q_lat_rad,
+            q_lon_rad,
+            q_cos,
+            np.ascontiguousarray(lat_rad),
+            np.ascontiguousarray(lon_rad),
+            np.ascontiguousarray(cos_lat),
+            out,
+        )
+        return out
+    return np.sin((lat_rad - q_lat_rad) / 2) ** 2 + q_cos * cos_lat * np.sin((lon_rad - q_lon_rad) / 2) ** 2
+
+
+@functools.lru_cache(maxsize=None)
+def _numba_kernel():
+    """Parallel Numba version of the `a` kernel, compiled on first use; None without numba."""
+    try:
+        import numba
+    except ImportError:
+        return None
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def haversine_a_batch(q_lat_rad, q_lon_rad, q_cos, lat_rad, lon_rad, cos_lat, out):
+        half = np.float32(0.5)  # a float64 literal would promote float32 inputs to float64
+        for i in numba.prange(lat_rad.shape[0]):
+            s_dphi = math.sin((lat_rad[i] - q_lat_rad) * half)
+            s_dlambda = math.sin((lon_rad[i] - q_lon_rad) * half)
+            out[i] = s_dphi * s_dphi + q_cos * cos_lat[i] * s_dlambda * s_dlambda
+
+    return haversine_a_batch
 
 
 def parse_latlon(text: str) -> Optional[Tuple[float, float]]:
@@ -130,7 +643,8 @@ def interactive_select(results):
     """If multiple results present, show a simple numbered menu and return the chosen index or None."""
     if not results:
         return None
-    if len(results) == 1:
+    if len(results) == 1 or not sys.stdin.isatty():
+        # nothing to choose, or no one to ask (piped/batch usage): take the nearest
         return 0
     print("Multiple matches found:")
     for i, (d, name, addr, plat, plon) in enumerate(results, start=1):
@@ -148,51 +662,106 @@ def interactive_select(results):
 
 def is_postal_code(text: str) -> bool:
     # naive postal code check: short numeric or alphanumeric tokens
-    t = text.strip()
-    return (len(t) <= 10) and any(c.isdigit() for c in t)
+    return bool(_POSTAL_RE.match(text.strip()))
+
+
+def lookup_postal_code(text: str, csv_path: Optional[Path] = None) -> Optional[Tuple[float, float]]:
+    """Resolve a postal code from the local centroid table (zip, lat, lon); None if unknown."""
+    table = _load_zip_centroids(csv_path or ZIP_FILE)
+    code = text.strip().upper()
+    # accept ZIP+4 ("10001-1234") by falling back to the 5-digit prefix
+    return table.get(code) or table.get(code.split("-")[0])
+
+
+@functools.lru_cache(maxsize=None)
+def _load_zip_centroids(csv_path: Path) -> Dict[str, Tuple[float, float]]:
+    table: Dict[str, Tuple[float, float]] = {}
+    if not csv_path.exists():
+        return table
+    with csv_path.open("r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        for row in reader:
+            try:
+                table[row[0].strip().upper()] = (float(row[1]), float(row[2]))
+            except (IndexError, ValueError):
+                continue
+    return table
+
+
+def resolve_address(address: str) -> Optional[Tuple[float, float]]:
+    """Turn 'lat,lon', a postal code or free text into (lat, lon); None if it can't be resolved."""
+    latlon = _resolve_locally(address)
+    return latlon if latlon is not None else geocode_address(address)
+
+
+def _resolve_locally(address: str) -> Optional[Tuple[float, float]]:
+    """The network-free part of resolve_address: 'lat,lon' or a known postal code."""
+    # try parsing lat,lon first
+    if "," in address:
+        latlon = parse_latlon(address)
+        if latlon is not None:
+            return latlon
+        print("Couldn't parse lat,lon. Will try geocoding the text as an address.")
+
+    # if looks like a short postal code, try the local centroid table before geocoding
+    if is_postal_code(address):
+        latlon = lookup_postal_code(address)
+        if latlon is not None:
+            return latlon
+        print("Detected postal code-like input; attempting geocoding.")
+    return None
 
 
 def main(argv=None):
     p = argparse.ArgumentParser(description="Find nearest food pantry by address.")
-    p.add_argument("--address", "-a", help="Address to search for (or 'lat,lon' or postal code)")
+    p.add_argument(
+        "--address", "-a", nargs="+", help="Address(es) to search for (or 'lat,lon' or postal code)"
+    )
     p.add_argument("--top", "-n", type=int, default=1, help="Return top N nearest results")
     p.add_argument("--radius", "-r", type=float, default=None, help="Maximum search radius in km")
     p.add_argument("--autolocate", action="store_true", help="Try to approximate user location via IP")
+    p.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Geocode multiple addresses with up to N concurrent requests (keep at 1 for the public Nominatim server)",
+    )
     args = p.parse_args(argv)
+    if args.top < 1:
+        p.error("--top must be at least 1")
+    if args.radius is not None and not (math.isfinite(args.radius) and args.radius > 0):
+        p.error("--radius must be a positive number")
+    if args.jobs < 1:
+        p.error("--jobs must be at least 1")
 
     try:
         pantries = load_pantries(DATA_FILE)
-    except FileNotFoundError as e:
+    except (FileNotFoundError, ValueError) as e:
         print(e)
         print(f"Expected sample data at: {DATA_FILE}")
         return 1
 
-    address = args.address
+    if args.address and len(args.address) > 1:
+        return _main_many(pantries, args)
+
+    address = args.address[0] if args.address else None
+    latlon = None
     if not address and args.autolocate:
         latlon = ip_autolocate()
         if latlon:
             print(f"Autolocated to: {latlon[0]:.6f},{latlon[1]:.6f}")
         else:
             print("Autolocate failed; please enter an address or coordinates.")
-            address = input("Enter your address (or 'lat,lon'): ").strip()
-    if not address:
+    if not address and latlon is None:
+        if not sys.stdin.isatty():
+            print("No address given; pass --address (or 'lat,lon') when not running interactively.")
+            return 2
         address = input("Enter your address (or 'lat,lon'): ").strip()
 
-    latlon = None
-    # try parsing lat,lon first
-    if "," in address:
-        latlon = parse_latlon(address)
-        if latlon is None:
-            print("Couldn't parse lat,lon. Will try geocoding the text as an address.")
-
-    # if looks like a short postal code, try geocoding that too (Nominatim can often handle postal codes)
-    if latlon is None and is_postal_code(address):
-        print("Detected postal code-like input; attempting geocoding.")
-        latlon = geocode_address(address)
-
     if latlon is None:
-        latlon = geocode_address(address)
-
+        latlon = resolve_address(address)
     if latlon is None:
         print("Please enter coordinates directly as 'lat,lon', or check your network.")
         return 1
@@ -220,5 +789,30 @@ def main(argv=None):
     return 0
 
 
+def _main_many(pantries: Pantries, args) -> int:
+    """Non-interactive multi-address run: geocode the misses as one batch, then look up all points at once."""
+    addresses = args.address
+    latlons = [_resolve_locally(a) for a in addresses]
+    misses = [a for a, ll in zip(addresses, latlons) if ll is None]
+    geocoded = iter(geocode_many(misses, concurrency=args.jobs))
+    latlons = [ll if ll is not None else next(geocoded) for ll in latlons]
+    resolved = [ll for ll in latlons if ll is not None]
+    nearest = iter(find_nearest_many(pantries, resolved, top=args.top, radius_km=args.radius))
+
+    status = 0
+    for address, latlon in zip(addresses, latlons):
+        print(f"{address}:")
+        if latlon is None:
+            print("  Could not resolve this address.")
+            status = 1
+            continue
+        results = next(nearest)
+        if not results:
+            print("  No pantries found within the given radius or dataset.")
+        for i, (d, name, addr, plat, plon) in enumerate(results, start=1):
+            print(f"  {i}. {name} — {addr} ({d:.2f} km) @ {plat},{plon}")
+    return status
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -1,7 +1,51 @@
+import io
+import json
 import math
+import shutil
+import time
 from pathlib import Path
 
-from scripts.find_pantry import haversine, load_pantries, parse_latlon
+import numpy as np
+import pytest
+
+from scripts import find_pantry
+from scripts.find_pantry import Pantries, find_nearest, haversine, load_pantries, parse_latlon
+
+
+@pytest.fixture
+def cli_data(tmp_path, monkeypatch):
+    """Point main() at a temporary copy of the sample data so its caches stay out of the repo."""
+    data_file = tmp_path / "pantries.csv"
+    shutil.copyfile(find_pantry.DATA_FILE, data_file)
+    monkeypatch.setattr(find_pantry, "DATA_FILE", data_file)
+    monkeypatch.setattr(find_pantry, "GEOCODE_CACHE_FILE", tmp_path / "geocode_cache.sqlite")
+    monkeypatch.setattr("sys.stdin", io.StringIO())
+    return data_file
+
+
+@pytest.fixture
+def nyc_csv(tmp_path):
+    """Three pantries around Manhattan: A (downtown), B (Brooklyn side), C (midtown)."""
+    csv = tmp_path / "pantries.csv"
+    csv.write_text("name,address,lat,lon\nA,Addr A,40.7128,-74.0060\nB,Addr B,40.7306,-73.9352\nC,Addr C,40.7580,-73.9855\n")
+    return csv
+
+
+@pytest.fixture
+def random_pantries():
+    """Factory for `n` random pantries named P0..P{n-1}, uniform in a lat/lon box or over the whole sphere."""
+
+    def make(n, lat_range=(39.0, 42.5), lon_range=(-76.0, -72.0), seed=0, sphere=False):
+        rng = np.random.default_rng(seed)
+        if sphere:
+            lats = np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, n)))
+            lons = rng.uniform(-180.0, 180.0, n)
+        else:
+            lats = rng.uniform(*lat_range, n)
+            lons = rng.uniform(*lon_range, n)
+        return Pantries([f"P{i}" for i in range(n)], [""] * n, lats, lons)
+
+    return make
 
 
 def test_haversine_known_distance():
@@ -24,3 +68,370 @@ def test_load_pantries_exists(tmp_path, monkeypatch):
     assert len(pantries) == 1
     assert pantries[0][0] == "A"
     assert pantries[0][2] == 10.0
+
+
+def test_find_nearest_matches_scalar_haversine(nyc_csv):
+    pantries = load_pantries(nyc_csv)
+    results = find_nearest(pantries, 40.7590, -73.9845, top=2)
+    assert [r[1] for r in results] == ["C", "B"]
+    # float32 columns only rank; the reported distance is recomputed in float64
+    assert math.isclose(results[0][0], haversine(40.7590, -73.9845, 40.7580, -73.9855), rel_tol=1e-12)
+
+
+def test_find_nearest_radius(nyc_csv):
+    pantries = load_pantries(nyc_csv)
+    results = find_nearest(pantries, 40.7590, -73.9845, top=5, radius_km=1.0)
+    assert [r[1] for r in results] == ["C"]
+
+
+def test_find_nearest_tree_matches_brute_force(nyc_csv):
+    pytest.importorskip("sklearn")
+    pantries = load_pantries(nyc_csv)
+    pantries.tree = find_pantry._build_tree(pantries)
+    with_tree = find_nearest(pantries, 40.7590, -73.9845, top=3, radius_km=5.3)
+    pantries.tree = None
+    brute = find_nearest(pantries, 40.7590, -73.9845, top=3, radius_km=5.3)
+    assert [r[1] for r in with_tree] == [r[1] for r in brute] == ["C", "B"]
+    for t, b in zip(with_tree, brute):
+        assert math.isclose(t[0], b[0], abs_tol=1e-9)
+
+
+def test_geocode_address_uses_disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(find_pantry, "GEOCODE_CACHE_FILE", tmp_path / "geocode.sqlite")
+    calls = []
+
+    def fake_search(address):
+        calls.append(address)
+        return 40.7128, -74.006
+
+    monkeypatch.setattr(find_pantry, "_nominatim_search", fake_search)
+    find_pantry._geocode_cached.cache_clear()
+    assert find_pantry.geocode_address("  New York  NY ") == (40.7128, -74.006)
+    # drop the in-process memo so the second lookup has to come from disk
+    find_pantry._geocode_cached.cache_clear()
+    assert find_pantry.geocode_address("new york ny") == (40.7128, -74.006)
+    assert calls == ["new york ny"]
+    find_pantry._geocode_cached.cache_clear()
+
+
+def test_geocode_many_dedupes_and_keeps_order(tmp_path, monkeypatch):
+    pytest.importorskip("aiohttp")
+    monkeypatch.setattr(find_pantry, "GEOCODE_CACHE_FILE", tmp_path / "geocode.sqlite")
+    calls = []
+
+    async def fake_search(session, address):
+        calls.append(address)
+        if address == "nowhere":
+            raise LookupError("Address not found by geocoder.")
+        return {"a": (1.0, 2.0), "b": (3.0, 4.0)}[address]
+
+    monkeypatch.setattr(find_pantry, "_nominatim_search_async", fake_search)
+    out = find_pantry.geocode_many(["a", "B", "nowhere", " a "], concurrency=2, delay=0)
+    assert out == [(1.0, 2.0), (3.0, 4.0), None, (1.0, 2.0)]
+    assert sorted(calls) == ["a", "b", "nowhere"]
+
+
+def test_geocode_many_rejects_zero_concurrency():
+    with pytest.raises(ValueError):
+        find_pantry.geocode_many(["a"], concurrency=0)
+
+
+def test_geocode_many_only_waits_between_requests(tmp_path, monkeypatch):
+    pytest.importorskip("aiohttp")
+    monkeypatch.setattr(find_pantry, "GEOCODE_CACHE_FILE", tmp_path / "geocode.sqlite")
+
+    async def fake_search(session, address):
+        return 1.0, 2.0
+
+    monkeypatch.setattr(find_pantry, "_nominatim_search_async", fake_search)
+    start = time.monotonic()
+    assert find_pantry.geocode_many(["a", "b"], delay=0.3) == [(1.0, 2.0), (1.0, 2.0)]
+    elapsed = time.monotonic() - start
+    assert 0.3 <= elapsed < 0.6
+
+
+def test_brute_force_radius_prefilter_matches_full_scan(random_pantries):
+    n = 500
+    pantries = random_pantries(n, seed=0)
+    everything = find_nearest(pantries, 40.75, -73.98, top=n)
+    within = find_nearest(pantries, 40.75, -73.98, top=n, radius_km=60.0)
+    assert within == [r for r in everything if r[0] <= 60.0]
+    assert 0 < len(within) < n
+
+
+def test_brute_force_radius_keeps_far_pantries_at_high_latitude():
+    pantries = Pantries(["P"], [""], [80.0], [60.0])
+    results = find_nearest(pantries, 80.0, 0.0, radius_km=1108.7)
+    assert [r[1] for r in results] == ["P"]
+    assert math.isclose(results[0][0], 1107.7, abs_tol=0.1)
+
+
+@pytest.mark.parametrize("lat, radius_km", [(85.0, 500.0), (45.0, 7000.0), (-60.0, 2500.0), (0.0, 15000.0)])
+def test_brute_force_radius_matches_exact_haversine(random_pantries, lat, radius_km):
+    n = 5000
+    pantries = random_pantries(n, seed=5, sphere=True)
+    found = {r[1] for r in find_nearest(pantries, lat, 10.0, top=n, radius_km=radius_km)}
+    exact = {name: haversine(lat, 10.0, plat, plon) for name, _, plat, plon in (pantries[i] for i in range(n))}
+    assert found == {name for name, d in exact.items() if d <= radius_km}
+
+
+def test_find_nearest_top_one_matches_top_n(random_pantries):
+    pantries = random_pantries(200, seed=1)
+    assert find_nearest(pantries, 40.75, -73.98, top=1) == find_nearest(pantries, 40.75, -73.98, top=5)[:1]
+
+
+def test_brute_force_reports_float64_distances(random_pantries):
+    n = 1000
+    pantries = random_pantries(n, seed=6, sphere=True)
+    for d, name, _, plat, plon in find_nearest(pantries, -33.9, 151.2, top=n):
+        # antipodal-range distances are where asin(sqrt(a)) amplifies float32 rounding the most
+        assert math.isclose(d, haversine(-33.9, 151.2, plat, plon), rel_tol=1e-12)
+
+
+def test_numba_kernel_matches_numpy(random_pantries):
+    pytest.importorskip("numba")
+    pantries = random_pantries(1000, lat_range=(-80.0, 80.0), lon_range=(-180.0, 180.0), seed=2)
+    q_lat_rad = math.radians(40.75)
+    args = (q_lat_rad, math.radians(-73.98), math.cos(q_lat_rad), pantries.lat_rad, pantries.lon_rad, pantries.cos_lat)
+    jitted = find_pantry._haversine_a(*args, jit=True)
+    assert jitted.dtype == np.float32
+    np.testing.assert_allclose(jitted, find_pantry._haversine_a(*args), rtol=1e-5, atol=1e-7)
+
+
+def test_numba_is_only_used_for_large_batches(random_pantries, monkeypatch):
+    seen = []
+
+    def fake_brute(pantries, lat, lon, top, radius_km, jit=False):
+        seen.append(jit)
+        return np.arange(0), np.zeros(0)
+
+    monkeypatch.setattr(find_pantry, "_nearest_brute", fake_brute)
+    monkeypatch.setattr(find_pantry, "TREE_MIN_WORK", math.inf)
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    pantries = random_pantries(20_000)
+    find_nearest(pantries, 40.75, -73.98)
+    find_pantry.find_nearest_many(pantries, [(40.75, -73.98)] * 9_999)  # just under NUMBA_MIN_WORK
+    assert set(seen) == {False}
+    find_pantry.find_nearest_many(pantries, [(40.75, -73.98)] * 10_000)
+    assert seen[-1] is True
+    monkeypatch.setattr("os.cpu_count", lambda: 1)  # single-threaded, NumPy is faster
+    find_pantry.find_nearest_many(pantries, [(40.75, -73.98)] * 10_000)
+    assert seen[-1] is False
+
+
+def test_lookup_postal_code(tmp_path):
+    csv = tmp_path / "zips.csv"
+    csv.write_text("zip,lat,lon\n10001,40.7506,-73.9972\nbad,row\n")
+    assert find_pantry.lookup_postal_code(" 10001 ", csv) == (40.7506, -73.9972)
+    assert find_pantry.lookup_postal_code("10001-1234", csv) == (40.7506, -73.9972)
+    assert find_pantry.lookup_postal_code("99999", csv) is None
+
+
+def test_load_pantries_skips_invalid_rows(tmp_path, capsys):
+    csv = tmp_path / "pantries.csv"
+    csv.write_text('name,address,lat,lon\nA,"1 Main St, Town",10.0,20.0\nB,Addr,oops,21.0\nC,Addr,12.0,\n,Addr D,13.0,23.0\n')
+    pantries = load_pantries(csv)
+    assert pantries.names == ["A", "Unnamed"]
+    assert pantries.addrs == ["1 Main St, Town", "Addr D"]
+    assert pantries.lats.tolist() == [10.0, 13.0]
+    assert pantries.lons.tolist() == [20.0, 23.0]
+    assert capsys.readouterr().out.count("Skipping invalid row") == 2
+
+
+def test_load_pantries_ignores_blank_lines_and_drops_bad_coordinates(tmp_path, capsys):
+    csv = tmp_path / "pantries.csv"
+    csv.write_text("name,address,lat,lon\nA,Addr,10.0,20.0\n\nB,Addr,nan,21.0\nC,Addr,12.0,inf\nD,Addr,95.0,22.0\n\nE,Addr,13.0,23.0\n")
+    pantries = load_pantries(csv)
+    assert pantries.names == ["A", "E"]
+    assert capsys.readouterr().out.count("Skipping invalid row") == 3
+    assert [r[1] for r in find_nearest(pantries, 13.0, 23.0)] == ["E"]
+
+
+def test_load_pantries_reuses_cache_until_csv_changes(tmp_path, monkeypatch):
+    csv = tmp_path / "pantries.csv"
+    csv.write_text("name,address,lat,lon\nA,Addr,10.0,20.0\n")
+    load_pantries(csv)
+    assert csv.with_suffix(".pkl").exists()
+
+    def no_parse(path):
+        raise AssertionError("CSV should not be reparsed")
+
+    monkeypatch.setattr(find_pantry, "_parse_pantries_csv", no_parse)
+    cached = load_pantries(csv)
+    assert cached.names == ["A"] and cached.lats.tolist() == [10.0]
+
+    monkeypatch.undo()
+    csv.write_text("name,address,lat,lon\nA,Addr,10.0,20.0\nB,Addr,11.0,21.0\n")
+    assert load_pantries(csv).names == ["A", "B"]
+
+
+def test_main_non_interactive_picks_nearest(cli_data, capsys):
+    assert find_pantry.main(["--address", "40.7590,-73.9845", "--top", "2"]) == 0
+    assert "Selected pantry: West End Pantry" in capsys.readouterr().out
+
+
+def test_main_non_interactive_requires_address(cli_data):
+    assert find_pantry.main([]) == 2
+
+
+def test_find_nearest_many_matches_single_queries(nyc_csv, monkeypatch):
+    monkeypatch.setattr(find_pantry, "TREE_MIN_WORK", 1)  # batch through the tree when scikit-learn is installed
+    pantries = load_pantries(nyc_csv)
+    points = [(40.7590, -73.9845), (40.7100, -74.0000)]
+    many = find_pantry.find_nearest_many(pantries, points, top=2, radius_km=5.3)
+    assert many == [find_nearest(pantries, lat, lon, top=2, radius_km=5.3) for lat, lon in points]
+
+
+def test_main_multiple_addresses(cli_data, capsys):
+    assert find_pantry.main(["-a", "40.7590,-73.9845", "40.7128,-74.0060", "-j", "2"]) == 0
+    out = capsys.readouterr().out
+    assert "40.7590,-73.9845:\n  1. West End Pantry" in out
+    assert "40.7128,-74.0060:\n  1. Community Food Pantry" in out
+
+
+def test_bbox_candidates_keep_everything_within_radius(random_pantries):
+    n = 2000
+    pantries = random_pantries(n, lat_range=(-60.0, 70.0), lon_range=(-180.0, 180.0), seed=3)
+    for lat, lon in [(40.75, -73.98), (65.0, 179.9), (-33.9, 151.2)]:
+        cand = set(find_pantry._bbox_candidates(pantries, lat, lon, 800.0).tolist())
+        within = {i for i in range(n) if haversine(lat, lon, pantries.lats[i], pantries.lons[i]) <= 800.0}
+        assert within <= cand
+        assert len(cand) < n
+
+
+def test_tree_is_only_built_for_large_batches(random_pantries, nyc_csv, monkeypatch):
+    built = []
+
+    def fake_build_tree(pantries):
+        built.append(len(pantries))
+        return None  # keep answering brute force
+
+    monkeypatch.setattr(find_pantry, "_build_tree", fake_build_tree)
+    pantries = load_pantries(nyc_csv)  # one-shot lookups never build (or unpickle) a tree
+    find_nearest(pantries, 40.7590, -73.9845)
+    assert built == [] and pantries.tree is None
+
+    pantries = random_pantries(20_000)
+    monkeypatch.setattr(find_pantry, "_nearest_brute", lambda *args: (np.arange(0), np.zeros(0)))  # only the gate matters
+    points = [(40.75, -73.98)] * 9_999  # queries x pantries just under TREE_MIN_WORK
+    find_pantry.find_nearest_many(pantries, points)
+    assert built == []
+    find_pantry.find_nearest_many(pantries, points + [(40.75, -73.98)])
+    assert built == [20_000]
+
+
+def test_pantries_sorted_by_latitude():
+    pantries = Pantries(["N", "S", "M"], ["n", "s", "m"], [41.0, 39.0, 40.0], [-73.0, -75.0, -74.0])
+    assert pantries.names == ["S", "M", "N"]
+    assert pantries.addrs == ["s", "m", "n"]
+    assert pantries.lons.tolist() == [-75.0, -74.0, -73.0]
+    assert pantries.lat_e7.tolist() == [390000000, 400000000, 410000000]
+
+
+def test_pantries_compare_by_identity():
+    a = Pantries(["A", "B"], ["", ""], [10.0, 11.0], [20.0, 21.0])
+    b = Pantries(["A", "B"], ["", ""], [10.0, 11.0], [20.0, 21.0])
+    # a field-wise __eq__ would hit the ambiguous truth value of the array columns
+    assert a == a
+    assert a != b
+
+
+def test_compiled_haversine_matches_python(monkeypatch):
+    compiled = pytest.importorskip("scripts._haversine")
+    assert math.isclose(compiled.haversine(40.7580, -73.9855, 40.7128, -74.0060), 5.3, abs_tol=0.1)
+    rng = np.random.default_rng(4)
+    lat_rad = np.radians(rng.uniform(-80.0, 80.0, 100)).astype(np.float32)
+    lon_rad = np.radians(rng.uniform(-180.0, 180.0, 100)).astype(np.float32)
+    args = (math.radians(40.75), math.radians(-73.98), math.cos(math.radians(40.75)), lat_rad, lon_rad, np.cos(lat_rad))
+    monkeypatch.setattr(find_pantry, "_haversine", compiled)
+    out = find_pantry._haversine_a(*args)
+    monkeypatch.setattr(find_pantry, "_haversine", None)
+    np.testing.assert_allclose(out, find_pantry._haversine_a(*args), rtol=1e-5)
+
+
+def test_is_postal_code():
+    for text in ("10001", " 10001-1234 ", "SW1A 1AA", "K1A 0B1"):
+        assert find_pantry.is_postal_code(text)
+    for text in ("", "London", "12345678901", "1 Main, NY"):
+        assert not find_pantry.is_postal_code(text)
+
+
+class _FakeResponse:
+    content = b'[{"lat": "40.7128", "lon": "-74.0060"}]'
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class _FakeSession:
+    def __init__(self):
+        self.params = []
+
+    def get(self, url, params=None, timeout=None):
+        self.params.append(params)
+        return _FakeResponse()
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_nominatim_search_requests_single_result(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(find_pantry, "orjson", None)
+    session = _FakeSession()
+    monkeypatch.setattr(find_pantry, "_SESSION", session)
+    monkeypatch.setattr(find_pantry, "NOMINATIM_MIN_INTERVAL", 0.0)
+    assert find_pantry._nominatim_search("new york") == (40.7128, -74.006)
+    params = session.params[0]
+    assert params["limit"] == 1
+    assert params["format"] == "jsonv2"
+    assert params["addressdetails"] == params["extratags"] == params["namedetails"] == 0
+
+
+def test_nominatim_search_is_throttled(monkeypatch):
+    monkeypatch.setattr(find_pantry, "_SESSION", _FakeSession())
+    monkeypatch.setattr(find_pantry, "NOMINATIM_MIN_INTERVAL", 0.2)
+    start = time.monotonic()
+    for _ in range(3):
+        find_pantry._nominatim_search("new york")
+    assert time.monotonic() - start >= 0.4
+
+
+def test_main_multiple_addresses_batches_geocoding(cli_data, monkeypatch, capsys):
+    calls = []
+
+    def fake_geocode_many(addresses, concurrency=1, delay=1.0):
+        calls.append((list(addresses), concurrency))
+        return [(40.7128, -74.0060) if a == "city hall" else None for a in addresses]
+
+    monkeypatch.setattr(find_pantry, "geocode_many", fake_geocode_many)
+    assert find_pantry.main(["-a", "10019", "city hall", "nowhere", "-j", "3"]) == 1
+    assert calls == [(["city hall", "nowhere"], 3)]
+    out = capsys.readouterr().out
+    assert "city hall:\n  1. Community Food Pantry" in out
+    assert "nowhere:\n  Could not resolve this address." in out
+
+
+def test_pantries_rejects_tree_over_unsorted_rows():
+    sklearn_neighbors = pytest.importorskip("sklearn.neighbors")
+    lats, lons = [41.0, 39.0], [-73.0, -75.0]
+    tree = sklearn_neighbors.BallTree(np.radians(np.column_stack([lats, lons])), metric="haversine")
+    with pytest.raises(ValueError):
+        Pantries(["N", "S"], ["n", "s"], lats, lons, tree=tree)
+
+
+def test_brute_force_handles_non_finite_radius():
+    pantries = Pantries(["A", "B"], ["", ""], [10.0, -40.0], [20.0, 150.0])
+    assert [r[1] for r in find_nearest(pantries, 10.0, 20.0, top=2, radius_km=math.inf)] == ["A", "B"]
+    assert [r[1] for r in find_nearest(pantries, 10.0, 20.0, top=2, radius_km=1e30)] == ["A", "B"]
+    assert find_nearest(pantries, 10.0, 20.0, top=2, radius_km=math.nan) == []
+
+
+@pytest.mark.parametrize("radius", ["inf", "nan", "0", "-1"])
+def test_main_rejects_bad_radius(cli_data, radius):
+    with pytest.raises(SystemExit) as exc:
+        find_pantry.main(["-a", "40.7,-74.0", "--radius", radius])
+    assert exc.value.code == 2